@@ -1,11 +1,21 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta, time as dtime
+from datetime import datetime, timedelta, timezone, time as dtime
 import urllib.parse
 import pdfplumber
 import re
 import os
+import hashlib
+import json
+import secrets
+import time
 from fpdf import FPDF
+from indice_clientes import IndiceClientes
+
+try:
+    from openpyxl import Workbook  # opcional: exportação em .xlsx
+except ImportError:
+    Workbook = None
 
 # =========================
 # CONFIGURAÇÃO GERAL
@@ -51,6 +61,18 @@ st.markdown(
 
 CLIENTES_FILE = "clientes.csv"
 OBRAS_FILE = "obras.csv"
+ITENS_FILE = "itens_obra.csv"
+COLS_ITENS = ["ID_Obra", "Item", "Descricao", "Quantidade", "Valor_Unitario", "Subtotal"]
+# Servido pelo Streamlit em /app/static/agenda-<token>.ics (enableStaticServing em .streamlit/config.toml);
+# o token aleatório, gerado uma vez, evita que a agenda fique num endereço adivinhável
+AGENDA_TOKEN_FILE = "agenda_token.txt"
+AGENDA_CACHE_FILE = "agenda_cache.json"
+AGENDA_ASSINATURA_FILE = "agenda_assinatura.json"
+STATUS_FINALIZADOS = ["🟢 Concluído", "🔴 Cancelado"]
+STATUS_OPCOES = ["🔵 Agendamento", "🟠 Orçamento Enviado", "🟤 Execução", "🟢 Concluído", "🔴 Cancelado"]
+# Servido pelo Streamlit em /app/static/exportacoes/ direto do disco; nomes aleatórios, apagados após 1h
+EXPORT_DIR = os.path.join("static", "exportacoes")
+EXPORT_BLOCO = 5000  # linhas por bloco na escrita dos arquivos
 
 # =========================
 # FUNÇÕES DE SUPORTE
@@ -88,55 +110,303 @@ def link_calendar(titulo, data_visita, hora_visita, duracao_min, local):
     params = f"&text={urllib.parse.quote(titulo)}&dates={start}/{end}&details={urllib.parse.quote('Visita Técnica')}&location={urllib.parse.quote(str(local))}&ctz=America/Sao_Paulo"
     return base + params
 
-def load_data():
-    if not os.path.exists(CLIENTES_FILE):
-        cols_c = ["ID", "Nome", "Telefone", "Email", "Endereco", "Data_Cadastro"]
-        df_c = pd.DataFrame(columns=cols_c)
-        df_c.to_csv(CLIENTES_FILE, index=False)
-    else:
-        df_c = pd.read_csv(CLIENTES_FILE)
+# =========================
+# AGENDA (ARQUIVO ICS)
+# =========================
+def caminho_agenda() -> str:
+    try:
+        with open(AGENDA_TOKEN_FILE, encoding="utf-8") as f: token = f.read().strip()
+    except OSError: token = ""
+    if not token:
+        token = secrets.token_urlsafe(24)
+        with open(AGENDA_TOKEN_FILE, "w", encoding="utf-8") as f: f.write(token)
+        # Versões antigas publicavam em static/agenda.ics, sem token
+        antigo = os.path.join("static", "agenda.ics")
+        if os.path.exists(antigo): os.remove(antigo)
+    return os.path.join("static", f"agenda-{token}.ics")
+
+AGENDA_FILE = caminho_agenda()
+
+def ics_texto(s) -> str:
+    s = str(s or "")
+    if s.lower() == "nan": s = ""
+    return s.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r", "").replace("\n", "\\n")
+
+def ics_dobrar(linha: str) -> str:
+    # RFC 5545: linhas de no máximo 75 octetos, continuação começa com espaço
+    partes, atual = [], ""
+    for ch in linha:
+        if len((atual + ch).encode("utf-8")) > (75 if not partes else 74):
+            partes.append(atual)
+            atual = ""
+        atual += ch
+    partes.append(atual)
+    return "\r\n ".join(partes)
+
+def eventos_obra(obra, endereco, dtstamp) -> str:
+    linhas = []
+    oid = int(obra["ID"])
+    cliente = str(obra["Cliente"])
+    desc_obra = str(obra.get("Descricao") or "")
+    if desc_obra.lower() == "nan": desc_obra = ""
+    descricao = f"Obra #{oid} - {obra['Status']}\n{desc_obra}"
+
+    data_visita = pd.to_datetime(obra.get("Data_Visita"), errors="coerce")
+    if pd.notnull(data_visita):
+        inicio = datetime.combine(data_visita.date(), dtime(9, 0))
+        fim = inicio + timedelta(minutes=60)
+        linhas += [
+            "BEGIN:VEVENT",
+            f"UID:obra-{oid}-visita@obragestor",
+            f"DTSTAMP:{dtstamp}",
+            f"DTSTART;TZID=America/Sao_Paulo:{inicio.strftime('%Y%m%dT%H%M%S')}",
+            f"DTEND;TZID=America/Sao_Paulo:{fim.strftime('%Y%m%dT%H%M%S')}",
+            f"SUMMARY:{ics_texto(f'Visita: {cliente}')}",
+            f"LOCATION:{ics_texto(endereco)}",
+            f"DESCRIPTION:{ics_texto(descricao)}",
+            "END:VEVENT",
+        ]
 
-    if not os.path.exists(OBRAS_FILE):
-        cols_o = [
-            "ID", "Cliente", "Status",
-            "Data_Contato", "Data_Visita", "Data_Orcamento", "Data_Aceite", "Data_Conclusao",
-            "Custo_MO", "Custo_Material", "Total", "Entrada", "Pago", "Descricao", "Observacoes"
+    data_contato = pd.to_datetime(obra.get("Data_Contato"), errors="coerce")
+    if pd.notnull(data_contato):
+        dia = data_contato.date()
+        linhas += [
+            "BEGIN:VEVENT",
+            f"UID:obra-{oid}-contato@obragestor",
+            f"DTSTAMP:{dtstamp}",
+            f"DTSTART;VALUE=DATE:{dia.strftime('%Y%m%d')}",
+            f"DTEND;VALUE=DATE:{(dia + timedelta(days=1)).strftime('%Y%m%d')}",
+            f"SUMMARY:{ics_texto(f'Ligar para {cliente}')}",
+            f"LOCATION:{ics_texto(endereco)}",
+            f"DESCRIPTION:{ics_texto(descricao)}",
+            "END:VEVENT",
         ]
-        df_o = pd.DataFrame(columns=cols_o)
-        df_o.to_csv(OBRAS_FILE, index=False)
-    else:
-        df_o = pd.read_csv(OBRAS_FILE)
-
-    defaults_c = {"ID": None, "Nome": "", "Telefone": "", "Email": "", "Endereco": "", "Data_Cadastro": ""}
-    df_c = ensure_cols(df_c, defaults_c)
-
-    defaults_o = {
-        "ID": None, "Cliente": "", "Status": "🔵 Agendamento",
-        "Data_Contato": None, "Data_Visita": None, "Data_Orcamento": None,
-        "Data_Aceite": None, "Data_Conclusao": None,
-        "Custo_MO": 0.0, "Custo_Material": 0.0, "Total": 0.0,
-        "Entrada": 0.0, "Pago": False, "Descricao": "", "Observacoes": ""
-    }
-    df_o = ensure_cols(df_o, defaults_o)
-
-    df_c["Nome"] = df_c["Nome"].astype(str).replace("nan", "").fillna("").str.strip()
-    df_o["Cliente"] = df_o["Cliente"].astype(str).replace("nan", "").fillna("").str.strip()
-    df_o["Status"] = df_o["Status"].apply(normalize_status)
-    df_o["Observacoes"] = df_o["Observacoes"].astype(str).replace("nan", "").fillna("")
-    
-    for col in ["Custo_MO", "Custo_Material", "Total", "Entrada"]:
-        df_o[col] = pd.to_numeric(df_o[col], errors="coerce").fillna(0.0)
+    return "\r\n".join(ics_dobrar(l) for l in linhas)
+
+def atualizar_agenda(df_c, df_o) -> bytes:
+    """Gera o .ics com visitas e contatos das obras ativas, refazendo só as obras alteradas."""
+    try:
+        with open(AGENDA_CACHE_FILE, encoding="utf-8") as f: cache = json.load(f)
+    except Exception: cache = {}
+
+    enderecos = {}
+    if not df_c.empty:
+        enderecos = dict(zip(df_c["Nome"].astype(str).str.strip(), df_c["Endereco"].astype(str).replace("nan", "")))
+
+    ativas = pd.DataFrame() if df_o is None or df_o.empty else df_o[~df_o["Status"].isin(STATUS_FINALIZADOS)]
+    novo_cache, alterou = {}, False
+    dtstamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    for obra in ativas.to_dict("records"):
+        oid = str(int(obra["ID"]))
+        endereco = enderecos.get(str(obra["Cliente"]).strip(), "")
+        chave = (obra["Cliente"], obra["Status"], obra.get("Descricao"), obra.get("Data_Visita"), obra.get("Data_Contato"), endereco)
+        assinatura = hashlib.md5(repr(chave).encode("utf-8")).hexdigest()
+        anterior = cache.get(oid)
+        if anterior and anterior.get("hash") == assinatura:
+            novo_cache[oid] = anterior
+        else:
+            novo_cache[oid] = {"hash": assinatura, "ics": eventos_obra(obra, endereco, dtstamp)}
+            alterou = True
+    if set(novo_cache) != set(cache): alterou = True
+
+    corpo = [v["ics"] for _, v in sorted(novo_cache.items(), key=lambda kv: int(kv[0])) if v["ics"]]
+    ics = "\r\n".join([
+        "BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//ObraGestor Pro//Agenda//PT-BR",
+        "CALSCALE:GREGORIAN", "X-WR-CALNAME:ObraGestor - Visitas e Contatos", "X-WR-TIMEZONE:America/Sao_Paulo",
+        "BEGIN:VTIMEZONE", "TZID:America/Sao_Paulo", "BEGIN:STANDARD", "DTSTART:19700101T000000",
+        "TZOFFSETFROM:-0300", "TZOFFSETTO:-0300", "TZNAME:-03", "END:STANDARD", "END:VTIMEZONE",
+        *corpo, "END:VCALENDAR", ""
+    ]).encode("utf-8")
+
+    if alterou or not os.path.exists(AGENDA_FILE):
+        os.makedirs(os.path.dirname(AGENDA_FILE), exist_ok=True)
+        with open(AGENDA_FILE, "wb") as f: f.write(ics)
+        with open(AGENDA_CACHE_FILE, "w", encoding="utf-8") as f: json.dump(novo_cache, f)
+    with open(AGENDA_ASSINATURA_FILE, "w", encoding="utf-8") as f: json.dump(_assinatura_arquivos(), f)
+    return ics
+
+def agenda_desatualizada() -> bool:
+    # Só olha mtime/tamanho dos CSVs; a agenda é refeita apenas depois de alguma gravação
+    if not os.path.exists(AGENDA_FILE): return True
+    try:
+        with open(AGENDA_ASSINATURA_FILE, encoding="utf-8") as f: return json.load(f) != _assinatura_arquivos()
+    except Exception: return True
 
-    df_o["Pago"] = df_o["Pago"].astype(str).str.strip().str.lower().isin(["true", "1", "yes", "sim"])
+# =========================
+# DADOS: SCHEMA VERSIONADO
+# =========================
+# Sobe a versão e registra uma nova função em MIGRACOES sempre que o formato dos CSVs mudar.
+SCHEMA_VERSAO = 1
+SCHEMA_FILE = "schema_versao.json"
+RELATORIO_MIGRACAO_FILE = "relatorio_migracao.csv"
+
+COLS_CLIENTES = {"ID": "", "Nome": "", "Telefone": "", "Email": "", "Endereco": "", "Data_Cadastro": ""}
+COLS_OBRAS = {
+    "ID": "", "Cliente": "", "Status": "🔵 Agendamento",
+    "Data_Contato": "", "Data_Visita": "", "Data_Orcamento": "",
+    "Data_Aceite": "", "Data_Conclusao": "",
+    "Custo_MO": "0.0", "Custo_Material": "0.0", "Total": "0.0",
+    "Entrada": "0.0", "Pago": "False", "Descricao": "", "Observacoes": ""
+}
+
+def ler_csv_bruto(path, cols: dict):
+    # Tudo como texto e sem converter vazio em NaN; a tipagem fica em tipar_dados
+    if not os.path.exists(path):
+        df = pd.DataFrame(columns=list(cols))
+        df.to_csv(path, index=False)
+        return df.astype(str)
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+def _assinatura_arquivos():
+    return {f: [os.stat(f).st_mtime_ns, os.stat(f).st_size] for f in (CLIENTES_FILE, OBRAS_FILE) if os.path.exists(f)}
+
+def ler_schema():
+    try:
+        with open(SCHEMA_FILE, encoding="utf-8") as f: return json.load(f)
+    except Exception: return {"versao": 0, "arquivos": {}}
+
+def registrar_schema(versao=SCHEMA_VERSAO):
+    with open(SCHEMA_FILE, "w", encoding="utf-8") as f:
+        json.dump({"versao": versao, "arquivos": _assinatura_arquivos(), "atualizado_em": datetime.now().isoformat(timespec="seconds")}, f)
+
+def _anotar(relatorio, arquivo, df, mask, correcao):
+    if not mask.any(): return
+    linhas = df.index[mask]
+    ids = df.loc[mask, "ID"] if "ID" in df.columns else [""] * len(linhas)
+    relatorio.extend({"Arquivo": arquivo, "Linha": int(i) + 2, "ID": str(v), "Correção": correcao} for i, v in zip(linhas, ids))
+
+def migrar_v1(df_c, df_o, relatorio):
+    """Reparos que antes rodavam a cada carga: colunas, 'nan', status, IDs e duplicados."""
+    for arquivo, df, cols in ((CLIENTES_FILE, df_c, COLS_CLIENTES), (OBRAS_FILE, df_o, COLS_OBRAS)):
+        for c, d in cols.items():
+            if c not in df.columns:
+                df[c] = d
+                relatorio.append({"Arquivo": arquivo, "Linha": "-", "ID": "", "Correção": f"Coluna '{c}' criada"})
+        for c in cols:
+            vazio = df[c].str.strip().str.lower() == "nan"
+            _anotar(relatorio, arquivo, df, vazio, f"'nan' removido de {c}")
+            df.loc[vazio, c] = ""
+    df_c["Nome"] = df_c["Nome"].str.strip()
+    df_o["Cliente"] = df_o["Cliente"].str.strip()
+
+    sem_status = df_o["Status"].str.strip() == ""
+    _anotar(relatorio, OBRAS_FILE, df_o, sem_status, "Status vazio -> 🔵 Agendamento")
+    df_o.loc[sem_status, "Status"] = "🔵 Agendamento"
 
+    for col in ["Custo_MO", "Custo_Material", "Total", "Entrada"]:
+        num = pd.to_numeric(df_o[col], errors="coerce")
+        _anotar(relatorio, OBRAS_FILE, df_o, num.isna(), f"{col} inválido -> 0")
+        df_o[col] = num.fillna(0.0).astype(str)
+
+    pago = df_o["Pago"].str.strip().str.lower()
+    _anotar(relatorio, OBRAS_FILE, df_o, ~pago.isin(["true", "false"]), "Pago padronizado")
+    df_o["Pago"] = pago.isin(["true", "1", "yes", "sim"]).map({True: "True", False: "False"})
+
+    sem_cliente = df_o["Cliente"] == ""
+    _anotar(relatorio, OBRAS_FILE, df_o, sem_cliente, "Obra sem cliente removida")
+    df_o = df_o[~sem_cliente].copy()
+
+    for arquivo, df, inicio in ((CLIENTES_FILE, df_c, 1), (OBRAS_FILE, df_o, 111)):
+        ids = pd.to_numeric(df["ID"], errors="coerce")
+        faltando = ids.isna()
+        _anotar(relatorio, arquivo, df, faltando, "ID ausente atribuído")
+        if faltando.any():
+            prox = int(ids.max()) + 1 if ids.notna().any() else inicio
+            ids.loc[faltando] = list(range(prox, prox + int(faltando.sum())))
+        df["ID"] = ids.astype(int).astype(str)
+
+    duplicados = df_o.duplicated(subset=["ID"], keep="last")
+    _anotar(relatorio, OBRAS_FILE, df_o, duplicados, "ID duplicado removido (mantida a última)")
+    df_o = df_o[~duplicados]
+    return df_c.reset_index(drop=True), df_o.reset_index(drop=True)
+
+MIGRACOES = {1: migrar_v1}
+
+def migrar_dados(df_c, df_o, versao_atual=0):
+    relatorio = []
+    df_c, df_o = df_c.copy(), df_o.copy()
+    for v in range(versao_atual + 1, SCHEMA_VERSAO + 1):
+        df_c, df_o = MIGRACOES[v](df_c, df_o, relatorio)
+    return df_c, df_o, pd.DataFrame(relatorio, columns=["Arquivo", "Linha", "ID", "Correção"])
+
+def tipar_dados(df_c, df_o):
+    # Só conversão de tipos (o CSV não guarda tipos); nenhum reparo aqui
+    df_c["ID"] = pd.to_numeric(df_c["ID"], errors="coerce")
+    df_o["ID"] = pd.to_numeric(df_o["ID"], errors="coerce").astype(int)
+    for col in ["Custo_MO", "Custo_Material", "Total", "Entrada"]:
+        df_o[col] = pd.to_numeric(df_o[col], errors="coerce").fillna(0.0)
+    df_o["Pago"] = df_o["Pago"] == "True"
     for col in ["Data_Visita", "Data_Orcamento", "Data_Conclusao", "Data_Contato"]:
         df_o[col] = pd.to_datetime(df_o[col], errors="coerce").dt.date
-
     return df_c, df_o
 
+def load_data():
+    df_c = ler_csv_bruto(CLIENTES_FILE, COLS_CLIENTES)
+    df_o = ler_csv_bruto(OBRAS_FILE, COLS_OBRAS)
+    schema = ler_schema()
+    intactos = schema.get("arquivos") == _assinatura_arquivos()
+    # Caminho rápido: dados já migrados e não alterados por fora desde o último save
+    if schema.get("versao") != SCHEMA_VERSAO or not intactos:
+        # Arquivo mexido por fora: roda todas as migrações de novo (são idempotentes)
+        versao = int(schema.get("versao", 0)) if intactos else 0
+        df_c, df_o, relatorio = migrar_dados(df_c, df_o, versao)
+        # Sempre sobrescreve, para não mostrar correções de uma migração anterior
+        relatorio.to_csv(RELATORIO_MIGRACAO_FILE, index=False)
+        df_c.to_csv(CLIENTES_FILE, index=False)
+        df_o.to_csv(OBRAS_FILE, index=False)
+        registrar_schema()
+    return tipar_dados(df_c, df_o)
+
 def save_data(df_c, df_o):
     df_c.to_csv(CLIENTES_FILE, index=False)
     df_o.to_csv(OBRAS_FILE, index=False)
+    registrar_schema()
+    # O índice desta sessão já reflete df_c (as telas o atualizam antes de salvar)
+    if "indice_clientes" in st.session_state:
+        st.session_state["indice_clientes_assinatura"] = _assinatura_arquivos().get(CLIENTES_FILE)
+
+def relatorio_validacao():
+    """Roda as migrações sobre os CSVs atuais sem gravar nada e lista o que seria corrigido."""
+    df_c = ler_csv_bruto(CLIENTES_FILE, COLS_CLIENTES)
+    df_o = ler_csv_bruto(OBRAS_FILE, COLS_OBRAS)
+    return migrar_dados(df_c, df_o, 0)[2]
+
+def load_itens():
+    if not os.path.exists(ITENS_FILE):
+        return pd.DataFrame(columns=COLS_ITENS)
+    df_i = ensure_cols(pd.read_csv(ITENS_FILE), {c: None for c in COLS_ITENS})
+    df_i["ID_Obra"] = pd.to_numeric(df_i["ID_Obra"], errors="coerce")
+    df_i = df_i[df_i["ID_Obra"].notna()].copy()
+    df_i["ID_Obra"] = df_i["ID_Obra"].astype(int)
+    df_i["Descricao"] = df_i["Descricao"].astype(str).replace("nan", "")
+    for col in ["Quantidade", "Valor_Unitario", "Subtotal"]:
+        df_i[col] = pd.to_numeric(df_i[col], errors="coerce").fillna(0.0)
+    return df_i[COLS_ITENS].reset_index(drop=True)
+
+def save_itens(df_i):
+    df_i.to_csv(ITENS_FILE, index=False)
+
+def gravar_itens_obra(df_i, obra_id, itens):
+    # Substitui os itens da obra pelos novos
+    obra_id = int(obra_id)
+    df_i = df_i[df_i["ID_Obra"] != obra_id]
+    if itens:
+        novos = pd.DataFrame([{"ID_Obra": obra_id, "Item": n, **it} for n, it in enumerate(itens, start=1)])
+        df_i = pd.concat([df_i, novos[COLS_ITENS]], ignore_index=True)
+    return df_i.reset_index(drop=True)
+
+def itens_da_obra(df_i, obra_id):
+    if df_i is None or df_i.empty or obra_id is None: return []
+    try: obra_id = int(obra_id)
+    except: return []
+    sel = df_i[df_i["ID_Obra"] == obra_id].sort_values("Item")
+    return sel[["Descricao", "Quantidade", "Valor_Unitario", "Subtotal"]].to_dict("records")
+
+def limpar_itens(df_i, df_o):
+    # Remove itens de obras que não existem mais
+    if df_i is None or df_i.empty: return df_i
+    ids = set() if df_o is None or df_o.empty else set(df_o["ID"].astype(int))
+    return df_i[df_i["ID_Obra"].isin(ids)].reset_index(drop=True)
 
 def limpar_obras(df):
     if df is None or df.empty: return df
@@ -202,7 +472,7 @@ class PDFOrcamento(FPDF):
         self.set_font('Arial', 'I', 8)
         self.cell(0, 10, txt_f(f'Página {self.page_no()}'), 0, 0, 'C')
 
-def gerar_pdf_bytes(dados_obra):
+def gerar_pdf_bytes(dados_obra, itens=None):
     pdf = PDFOrcamento()
     pdf.add_page()
     
@@ -233,6 +503,27 @@ def gerar_pdf_bytes(dados_obra):
     pdf.multi_cell(0, 6, txt(dados_obra['Descricao']))
     pdf.ln(8)
 
+    # Itens do orçamento
+    if itens:
+        pdf.set_font('Arial', 'B', 10)
+        pdf.cell(0, 6, txt("ITENS DO ORÇAMENTO:"), 0, 1, 'L')
+        pdf.set_font('Arial', 'B', 9)
+        pdf.cell(100, 7, txt("Descrição"), 1, 0, 'L', fill=True)
+        pdf.cell(20, 7, txt("Qtd"), 1, 0, 'C', fill=True)
+        pdf.cell(35, 7, txt("Valor Unit."), 1, 0, 'R', fill=True)
+        pdf.cell(0, 7, txt("Subtotal"), 1, 1, 'R', fill=True)
+        pdf.set_font('Arial', '', 9)
+        for it in itens:
+            qtd = float(it.get('Quantidade', 0) or 0)
+            qtd_txt = f"{qtd:g}".replace(".", ",")
+            desc_it = str(it.get('Descricao', ''))
+            if len(desc_it) > 60: desc_it = desc_it[:57] + "..."
+            pdf.cell(100, 7, txt(desc_it), 1, 0, 'L')
+            pdf.cell(20, 7, txt(qtd_txt), 1, 0, 'C')
+            pdf.cell(35, 7, txt(br_money(it.get('Valor_Unitario', 0))), 1, 0, 'R')
+            pdf.cell(0, 7, txt(br_money(it.get('Subtotal', 0))), 1, 1, 'R')
+        pdf.ln(8)
+
     # Valores
     pdf.set_font('Arial', 'B', 10)
     pdf.cell(0, 6, txt("RESUMO DE VALORES:"), 0, 1, 'L')
@@ -259,16 +550,6 @@ def gerar_pdf_bytes(dados_obra):
 # =========================
 # FUNÇÕES DE IMPORTAÇÃO
 # =========================
-def extrair_texto_pdf(pdf_file) -> str:
-    try:
-        with pdfplumber.open(pdf_file) as pdf:
-            partes = []
-            for page in pdf.pages:
-                t = page.extract_text()
-                if t: partes.append(t)
-            return "\n".join(partes).strip()
-    except: return ""
-
 def brl_to_float(valor_txt: str) -> float:
     s = str(valor_txt or "").strip()
     s = s.replace("\xa0", " ").replace("R$", "").strip()
@@ -337,10 +618,152 @@ def extrair_dados_pdf_solucao(text: str):
     dados["Descricao"] = "\n".join(desc).strip() if desc else "Serviço de Reforma"
     return dados
 
-def extrair_dados_pdf(pdf_file):
-    text = extrair_texto_pdf(pdf_file)
+# --- Itens do orçamento (tabelas / posição das palavras) ---
+RE_MOEDA = re.compile(r"(?:R\$)?\s*(\d{1,3}(?:\.\d{3})*,\d{2}|\d+,\d{2})")
+RE_QTD = re.compile(r"\d+(?:,\d+)?")
+ROTULOS_SUBTOTAL = {"subtotal", "sub-total", "sub total", "valor", "valor r$", "valor (r$)"}
+IGNORAR_ITENS = ["solução reforma", "antônio francisco", "rua bandeirantes", "pedra mole", "contato:", "orçamento", "criado em", "cliente:"]
+
+def _num_token(tok: str):
+    tok = tok.strip()
+    if tok in ("R$", ""): return None
+    if RE_MOEDA.fullmatch(tok) or RE_QTD.fullmatch(tok):
+        try: return brl_to_float(tok)
+        except: return None
+    return None
+
+def _montar_item(desc, nums):
+    # nums: valores numéricos da direita da linha, na ordem em que aparecem
+    desc = " ".join(desc).strip(" -:")
+    if not desc or not nums: return None
+    if len(nums) >= 3:
+        qtd, unit, sub = nums[-3:]
+    elif len(nums) == 2:
+        qtd, sub = nums
+        unit = sub / qtd if qtd else sub
+    else:
+        qtd, sub = 1.0, nums[0]
+        unit = sub
+    if sub == 0 and qtd and unit: sub = round(qtd * unit, 2)
+    return {"Descricao": desc, "Quantidade": float(qtd), "Valor_Unitario": round(float(unit), 2), "Subtotal": round(float(sub), 2)}
+
+def itens_de_linhas(linhas):
+    """linhas: lista de linhas; cada linha é lista de (texto, x_relativo 0..1)."""
+    itens, pendente, capturar = [], [], False
+    for palavras in linhas:
+        texto = " ".join(t for t, _ in palavras).strip()
+        low = texto.lower()
+        if not texto: continue
+        if low.startswith("descrição") or low.startswith("descricao"):
+            capturar = True
+            continue
+        if not capturar: continue
+        if low.startswith("total") or low.startswith("valor total"): break
+
+        # Números só contam como colunas se estiverem no fim da linha e na metade direita
+        desc, nums = [t for t, _ in palavras], []
+        while desc:
+            t, x = palavras[len(desc) - 1]
+            v = _num_token(t)
+            if t.strip() == "R$": desc.pop(); continue
+            if v is None or x < 0.45: break
+            nums.insert(0, v); desc.pop()
+
+        if not nums:
+            # Cabeçalho/rodapé repetido (empresa, endereço, títulos de coluna...) só é descartado em linhas sem valores
+            if low.startswith("subtotal") or low.startswith("valor"): continue
+            if not any(bad in low for bad in IGNORAR_ITENS): pendente.append(texto)
+            continue
+        if " ".join(desc).strip(" :").lower() in ROTULOS_SUBTOTAL: continue
+        item = _montar_item(pendente + desc, nums)
+        pendente = []
+        if item: itens.append(item)
+    return itens
+
+def itens_de_tabela(tabela):
+    """Converte uma tabela do pdfplumber (lista de linhas) em itens, se tiver cabeçalho reconhecível."""
+    if not tabela or len(tabela) < 2: return []
+    cab = [str(c or "").strip().lower() for c in tabela[0]]
+    col = {}
+    for i, c in enumerate(cab):
+        if "descri" in c or "serviço" in c or "servico" in c: col.setdefault("desc", i)
+        elif "qt" in c or "quant" in c: col.setdefault("qtd", i)
+        elif "unit" in c or "preço" in c or "preco" in c: col.setdefault("unit", i)
+        elif "total" in c or "valor" in c: col.setdefault("sub", i)
+    if "desc" not in col or "sub" not in col: return []
+
+    def cel(linha, chave):
+        i = col.get(chave)
+        return str(linha[i] or "").strip() if i is not None and i < len(linha) else ""
+
+    itens = []
+    for linha in tabela[1:]:
+        desc = cel(linha, "desc").replace("\n", " ")
+        if not desc or desc.lower().startswith("total"): continue
+        v = {k: _num_token(cel(linha, k).replace("R$", "")) for k in ("qtd", "unit", "sub")}
+        if v["sub"] is None: continue
+        qtd = v["qtd"] or (round(v["sub"] / v["unit"], 2) if v["unit"] else 1.0)
+        unit = v["unit"] if v["unit"] is not None else v["sub"] / qtd
+        itens.append({"Descricao": desc, "Quantidade": float(qtd), "Valor_Unitario": round(float(unit), 2), "Subtotal": round(float(v["sub"]), 2)})
+    return itens
+
+def linhas_por_posicao(page, tolerancia=3):
+    # Agrupa as palavras pela coordenada vertical: nova linha só quando o topo se afasta
+    # mais que `tolerancia` do topo da linha atual (negrito/baseline deslocada não quebra)
+    largura = float(page.width) or 1.0
+    linhas, atual, topo = [], [], None
+    for w in sorted(page.extract_words(use_text_flow=False), key=lambda w: float(w["top"])):
+        if topo is not None and float(w["top"]) - topo > tolerancia:
+            linhas.append(atual)
+            atual, topo = [], None
+        if topo is None: topo = float(w["top"])
+        atual.append((float(w["x0"]), w["text"]))
+    if atual: linhas.append(atual)
+    return [[(t, x / largura) for x, t in sorted(ws)] for ws in linhas]
+
+def conferir_itens(itens, total):
+    soma = round(sum(float(it["Subtotal"]) for it in itens), 2)
+    return soma, abs(soma - float(total or 0)) <= 0.01
+
+def extrair_dados_pdf(pdf_file, com_itens=True):
+    # Abre o PDF uma única vez: texto para os campos e tabelas/palavras para os itens
+    itens_ok = com_itens
+    try:
+        with pdfplumber.open(pdf_file) as pdf:
+            partes, linhas, itens = [], [], []
+            for page in pdf.pages:
+                t = page.extract_text()
+                if t: partes.append(t)
+                if not itens_ok: continue
+                # Itens são opcionais: se falharem, o PDF ainda é importado só com o texto
+                try:
+                    # Só procura tabelas se a página tiver linhas/retângulos desenhados
+                    if page.lines or page.rects:
+                        for tabela in page.extract_tables():
+                            itens.extend(itens_de_tabela(tabela))
+                    linhas.extend(linhas_por_posicao(page))
+                except Exception: itens_ok = False
+            text = "\n".join(partes).strip()
+    except: return None
     if not text: return None
-    return extrair_dados_pdf_solucao(text)
+    dados = extrair_dados_pdf_solucao(text)
+    if com_itens:
+        if itens_ok and not itens:
+            try: itens = itens_de_linhas(linhas)
+            except Exception: itens_ok = False
+        dados["Itens"] = itens if itens_ok else []
+    return dados
+
+def obter_indice_clientes(df_c) -> IndiceClientes:
+    # Guardado na sessão; as telas de cliente mantêm o índice em dia e save_data
+    # registra a assinatura do CSV. Se o arquivo mudou por outra sessão, reconstrói.
+    idx = st.session_state.get("indice_clientes")
+    if idx is None or st.session_state.get("indice_clientes_assinatura") != _assinatura_arquivos().get(CLIENTES_FILE):
+        nomes = df_c["Nome"].astype(str).str.strip().tolist() if not df_c.empty else []
+        idx = IndiceClientes(nomes)
+        st.session_state["indice_clientes"] = idx
+        st.session_state["indice_clientes_assinatura"] = _assinatura_arquivos().get(CLIENTES_FILE)
+    return idx
 
 def resumo_por_cliente(df_c, df_o):
     if df_c.empty: return pd.DataFrame()
@@ -371,6 +794,73 @@ def resumo_por_cliente(df_c, df_o):
     base["Pendente"] = (base["Total"] - base["Recebido"]).clip(lower=0.0)
     return base[["Nome", "Telefone", "Endereco", "Fase", "Total", "Recebido", "Pendente"]]
 
+# =========================
+# EXPORTAÇÃO
+# =========================
+COLS_EXPORT_OBRAS = ["ID", "Cliente", "Status", "Data_Contato", "Data_Visita", "Data_Orcamento", "Data_Conclusao",
+                     "Custo_MO", "Custo_Material", "Total", "Entrada", "Pago", "Descricao"]
+
+def filtrar_obras(df_o, status=None, inicio=None, fim=None, campo_data="Data_Orcamento"):
+    # Devolve só a máscara; exportar_arquivo copia as linhas marcadas bloco a bloco
+    mask = pd.Series(True, index=df_o.index)
+    if status: mask &= df_o["Status"].isin(status)
+    if inicio or fim:
+        datas = pd.to_datetime(df_o[campo_data], errors="coerce")
+        if inicio: mask &= datas >= pd.Timestamp(inicio)
+        if fim: mask &= datas <= pd.Timestamp(fim)
+    return mask
+
+def totais_financeiros(df_o):
+    cols = ["Status", "Obras", "Total", "Recebido", "Pendente"]
+    if df_o is None or df_o.empty: return pd.DataFrame(columns=cols)
+    recebido = df_o["Total"].where(df_o["Pago"].astype(bool), df_o["Entrada"])
+    base = pd.DataFrame({"Status": df_o["Status"], "Total": df_o["Total"], "Recebido": recebido})
+    tot = base.groupby("Status", as_index=False).agg(Obras=("Total", "size"), Total=("Total", "sum"), Recebido=("Recebido", "sum"))
+    tot["Pendente"] = (tot["Total"] - tot["Recebido"]).clip(lower=0.0)
+    geral = pd.DataFrame([{"Status": "TOTAL GERAL", "Obras": int(tot["Obras"].sum()), "Total": tot["Total"].sum(),
+                           "Recebido": tot["Recebido"].sum(), "Pendente": tot["Pendente"].sum()}])
+    return pd.concat([tot, geral], ignore_index=True)[cols]
+
+def _blocos(df, mask=None, colunas=None, tamanho=EXPORT_BLOCO):
+    # Só o bloco atual é copiado (filtrado pela máscara e reduzido às colunas)
+    colunas = list(df.columns) if colunas is None else colunas
+    for i in range(0, len(df), tamanho):
+        bloco = df.iloc[i:i + tamanho]
+        if mask is not None: bloco = bloco[mask.iloc[i:i + tamanho].to_numpy()]
+        yield bloco[colunas]
+
+def _limpar_exportacoes(idade_max_s=3600):
+    # Apaga arquivos de exportação antigos (de qualquer sessão)
+    if not os.path.isdir(EXPORT_DIR): return
+    agora = time.time()
+    for nome in os.listdir(EXPORT_DIR):
+        caminho = os.path.join(EXPORT_DIR, nome)
+        try:
+            if agora - os.path.getmtime(caminho) > idade_max_s: os.remove(caminho)
+        except OSError: pass
+
+def exportar_arquivo(df, nome_base, formato="csv", mask=None, colunas=None):
+    """Escreve df (as linhas de `mask`, nas `colunas`) em disco bloco a bloco e devolve o caminho."""
+    colunas = list(df.columns) if colunas is None else colunas
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _limpar_exportacoes()
+    caminho = os.path.join(EXPORT_DIR, f"{nome_base}_{secrets.token_urlsafe(24)}.{formato}")
+    if formato == "xlsx":
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(nome_base[:31])
+        ws.append(colunas)
+        for bloco in _blocos(df, mask, colunas):
+            for linha in bloco.itertuples(index=False, name=None):
+                ws.append([None if pd.isna(v) else v for v in linha])
+        wb.save(caminho)
+    else:
+        # utf-8-sig para o Excel abrir os acentos corretamente
+        with open(caminho, "w", encoding="utf-8-sig", newline="") as f:
+            f.write(";".join(colunas) + "\n")
+            for bloco in _blocos(df, mask, colunas):
+                bloco.to_csv(f, header=False, index=False, sep=";", decimal=",")
+    return caminho
+
 def excluir_cliente(df_clientes, df_obras, nome, apagar_obras=True):
     nome = str(nome).strip()
     df_clientes = df_clientes[df_clientes["Nome"].astype(str).str.strip() != nome].reset_index(drop=True)
@@ -388,8 +878,9 @@ def excluir_obra(df_obras, obra_id):
 # MAIN APP
 # =========================
 df_clientes, df_obras = load_data()
-df_obras = limpar_obras(df_obras)
-save_data(df_clientes, df_obras)
+df_itens = load_itens()
+if agenda_desatualizada(): atualizar_agenda(df_clientes, df_obras)
+indice_clientes = obter_indice_clientes(df_clientes)
 
 st.sidebar.title("🏗️ ObraGestor Pro")
 menu = st.sidebar.radio("Navegação", ["Dashboard", "Gestão de Obras", "Clientes", "Importar/Exportar"])
@@ -462,7 +953,13 @@ elif menu == "Importar/Exportar":
         if dados_pdf:
             st.success("✅ PDF lido! Confira e salve.")
             st.divider()
+            sugerido, similaridade = indice_clientes.buscar(dados_pdf.get("Cliente", ""))
             with st.form("form_importacao"):
+                usar_sugerido = False
+                if sugerido:
+                    st.info(f"🔎 Cliente parecido já cadastrado: **{sugerido}** ({similaridade:.0%} de semelhança)")
+                    # Só vem marcado quando é o mesmo nome normalizado; parecido não é garantia de ser a mesma pessoa
+                    usar_sugerido = st.checkbox(f"Usar o cliente existente '{sugerido}'", value=similaridade >= 1.0)
                 c_imp1, c_imp2 = st.columns(2)
                 imp_cliente = c_imp1.text_input("Nome do Cliente", value=dados_pdf.get("Cliente", ""))
                 val_data = datetime.now().date()
@@ -472,13 +969,28 @@ elif menu == "Importar/Exportar":
                 imp_data = c_imp2.date_input("Data do Orçamento", value=val_data)
                 imp_total = st.number_input("Valor Total (R$)", value=float(dados_pdf.get("Total", 0.0)), step=10.0)
                 imp_desc = st.text_area("Descrição do Serviço", value=dados_pdf.get("Descricao", ""), height=100)
+
+                itens_pdf = dados_pdf.get("Itens") or []
+                if itens_pdf:
+                    st.caption(f"Itens encontrados no PDF ({len(itens_pdf)}):")
+                    itens_show = pd.DataFrame(itens_pdf)
+                    for col in ["Valor_Unitario", "Subtotal"]:
+                        itens_show[col] = itens_show[col].apply(br_money)
+                    st.dataframe(itens_show, use_container_width=True)
+                    soma_itens, itens_ok = conferir_itens(itens_pdf, dados_pdf.get("Total", 0.0))
+                    if itens_ok: st.caption(f"✅ Soma dos itens confere com o total ({br_money(soma_itens)}).")
+                    else: st.warning(f"⚠️ Soma dos itens ({br_money(soma_itens)}) difere do total do PDF ({br_money(dados_pdf.get('Total', 0.0))}).")
                 
                 if st.form_submit_button("💾 CONFIRMAR E SALVAR"):
                     imp_clean = imp_cliente.strip()
-                    existe_cli = False
-                    if not df_clientes.empty:
-                         if imp_clean in df_clientes["Nome"].astype(str).str.strip().values:
-                             existe_cli = True
+                    # Se o usuário editou o nome, vale o que ele digitou
+                    if usar_sugerido and imp_clean == str(dados_pdf.get("Cliente", "")).strip(): imp_clean = sugerido
+                    # Sozinho, só reaproveita o cadastro com o mesmo nome (ignorando caixa/espaços);
+                    # nomes só parecidos dependem da sugestão acima, que o usuário pode recusar
+                    chave_imp = " ".join(imp_clean.split()).casefold()
+                    existente = next((n for n in df_clientes["Nome"].astype(str) if " ".join(n.split()).casefold() == chave_imp), None)
+                    existe_cli = existente is not None
+                    if existe_cli: imp_clean = existente
                     
                     if not existe_cli:
                          novo_id_cli = 1
@@ -490,6 +1002,7 @@ elif menu == "Importar/Exportar":
                              "Data_Cadastro": datetime.now().strftime("%Y-%m-%d")
                          }])
                          df_clientes = pd.concat([df_clientes, novo_cliente], ignore_index=True)
+                         indice_clientes.adicionar(imp_clean)
                          st.toast(f"Novo cliente '{imp_clean}' cadastrado!")
 
                     # LOGICA DE ID INICIANDO EM 111
@@ -511,12 +1024,74 @@ elif menu == "Importar/Exportar":
                     df_obras = pd.concat([df_obras, nova_obra], ignore_index=True)
                     df_obras = limpar_obras(df_obras)
                     save_data(df_clientes, df_obras)
+                    if itens_pdf:
+                        df_itens = gravar_itens_obra(df_itens, novo_id_obra, itens_pdf)
+                        save_itens(df_itens)
                     st.success(f"Importação concluída! Orçamento #{novo_id_obra} criado.")
                     st.balloons()
                     del st.session_state["dados_pdf_cache"]
         else: st.error("Erro ao ler PDF.")
     st.markdown("</div>", unsafe_allow_html=True)
 
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    st.subheader("2) Agenda de Visitas e Contatos (.ics)")
+    st.caption("Um único calendário com as visitas (09:00, 1h) e os lembretes de contato de todas as obras ativas.")
+    if os.path.exists(AGENDA_FILE):
+        with open(AGENDA_FILE, "rb") as f_ics:
+            st.download_button("📅 Baixar Agenda (.ics)", data=f_ics.read(), file_name="agenda_obras.ics", mime="text/calendar")
+    st.caption(f"Para assinar no Google Agenda/Outlook, use o endereço do app seguido de `/app/static/{os.path.basename(AGENDA_FILE)}` (não compartilhe: o link dá acesso à agenda).")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    st.subheader("3) Validação dos Dados")
+    st.caption(f"Versão do formato dos dados: {ler_schema().get('versao', 0)} (atual: {SCHEMA_VERSAO})")
+    if st.button("🔍 Gerar Relatório de Validação"):
+        relatorio = relatorio_validacao()
+        if relatorio.empty: st.success("Nenhuma linha precisa de correção.")
+        else:
+            st.warning(f"{len(relatorio)} correção(ões) necessária(s).")
+            st.dataframe(relatorio, use_container_width=True)
+    if os.path.exists(RELATORIO_MIGRACAO_FILE):
+        with st.expander("Última migração: linhas corrigidas"):
+            ultima = pd.read_csv(RELATORIO_MIGRACAO_FILE, dtype=str)
+            if ultima.empty: st.caption("A última migração não precisou corrigir nenhuma linha.")
+            else: st.dataframe(ultima, use_container_width=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    st.subheader("4) Exportar Dados")
+    tipo_exp = st.selectbox("O que exportar?", ["Resumo por Cliente", "Obras", "Totais Financeiros"])
+    formatos = ["csv", "xlsx"] if Workbook is not None else ["csv"]
+    formato_exp = st.radio("Formato", formatos, horizontal=True, format_func=str.upper)
+    if Workbook is None: st.caption("Instale o pacote openpyxl para exportar em .xlsx.")
+
+    if tipo_exp == "Obras":
+        f_status = st.multiselect("Status", STATUS_OPCOES, default=[])
+        c_exp1, c_exp2, c_exp3 = st.columns(3)
+        campos_data = {"Data do Orçamento": "Data_Orcamento", "Data da Visita": "Data_Visita", "Data de Contato": "Data_Contato"}
+        f_campo = c_exp1.selectbox("Filtrar pela", list(campos_data))
+        f_ini = c_exp2.date_input("De", value=None)
+        f_fim = c_exp3.date_input("Até", value=None)
+
+    # O link só aparece logo após gerar o arquivo. O download é servido do disco pelo
+    # servidor de arquivos estáticos, sem passar o conteúdo pela memória da sessão.
+    if st.button("📦 Gerar Arquivo de Exportação"):
+        mask_exp, cols_exp = None, None
+        if tipo_exp == "Resumo por Cliente":
+            df_exp, nome_exp = resumo_por_cliente(df_clientes, df_obras), "resumo_clientes"
+        elif tipo_exp == "Obras":
+            df_exp, nome_exp = df_obras, "obras"
+            mask_exp, cols_exp = filtrar_obras(df_obras, f_status, f_ini, f_fim, campos_data[f_campo]), COLS_EXPORT_OBRAS
+        else:
+            df_exp, nome_exp = totais_financeiros(df_obras), "totais_financeiros"
+        caminho_exp = exportar_arquivo(df_exp, nome_exp, formato_exp, mask_exp, cols_exp)
+        n_linhas = int(mask_exp.sum()) if mask_exp is not None else len(df_exp)
+        nome_download = f"{nome_exp}_{datetime.now().strftime('%Y%m%d')}.{formato_exp}"
+        link_exp = "app/static/exportacoes/" + urllib.parse.quote(os.path.basename(caminho_exp))
+        st.markdown(f'''<a href="{link_exp}" download="{nome_download}" target="_blank" style="text-decoration:none;"><button style="width:100%; padding:0.5rem; background-color:#E8F0FE; color:#1967D2; border:1px solid #1967D2; border-radius:8px; cursor:pointer;">⬇️ Baixar {nome_download} ({n_linhas} linhas)</button></a>''', unsafe_allow_html=True)
+        st.caption("O link fica disponível por 1 hora.")
+    st.markdown("</div>", unsafe_allow_html=True)
+
 elif menu == "Clientes":
     st.markdown("<div class='section-title'>Clientes</div>", unsafe_allow_html=True)
     tab1, tab2, tab3, tab4 = st.tabs(["Listagem", "Novo", "Editar", "Excluir"])
@@ -551,6 +1126,7 @@ elif menu == "Clientes":
                         "Data_Cadastro": datetime.now().strftime("%Y-%m-%d")
                     }])
                     df_clientes = pd.concat([df_clientes, novo_registro], ignore_index=True)
+                    indice_clientes.adicionar(nome.strip())
                     save_data(df_clientes, df_obras)
                     st.success("Cliente salvo!")
                     st.rerun()
@@ -582,6 +1158,7 @@ elif menu == "Clientes":
                         df_clientes = pd.concat([df_clientes, linha_atualizada], ignore_index=True)
                         if novo_nome.strip() != cli_edit:
                             df_obras.loc[df_obras["Cliente"] == cli_edit, "Cliente"] = novo_nome.strip()
+                            indice_clientes.renomear(cli_edit, novo_nome.strip())
                         save_data(df_clientes, df_obras)
                         st.success("Dados atualizados!")
                         st.rerun()
@@ -597,8 +1174,11 @@ elif menu == "Clientes":
                 if not confirm_del: st.error("Marque a caixa de confirmação.")
                 else:
                     df_clientes, df_obras = excluir_cliente(df_clientes, df_obras, nome_del, del_obras)
+                    indice_clientes.remover(nome_del, todos=True)
                     df_obras = limpar_obras(df_obras)
                     save_data(df_clientes, df_obras)
+                    df_itens = limpar_itens(df_itens, df_obras)
+                    save_itens(df_itens)
                     st.success("Cliente excluído com sucesso.")
                     st.rerun()
 
@@ -679,7 +1259,7 @@ elif menu == "Gestão de Obras":
                     st.write("") 
 
                 with st.form("form_obra"):
-                    status = st.selectbox("Status", ["🔵 Agendamento", "🟠 Orçamento Enviado", "🟤 Execução", "🟢 Concluído", "🔴 Cancelado"], index=["🔵 Agendamento", "🟠 Orçamento Enviado", "🟤 Execução", "🟢 Concluído", "🔴 Cancelado"].index(normalize_status(dados_obra["Status"])))
+                    status = st.selectbox("Status", STATUS_OPCOES, index=STATUS_OPCOES.index(normalize_status(dados_obra["Status"])))
                     desc = st.text_area("Descrição (Vai no PDF)", value=str(dados_obra["Descricao"]))
                     obs_internas = st.text_area("Notas / Observações Internas (Só pra você)", value=str(dados_obra.get("Observacoes", "")), placeholder="Ex: Cliente prefere contato após as 14h; Comprar cimento...")
 
@@ -737,7 +1317,7 @@ elif menu == "Gestão de Obras":
                     st.markdown("##### 📄 Exportar Orçamento")
                     if st.button("Gerar PDF do Orçamento"):
                         try:
-                            pdf_bytes = gerar_pdf_bytes(dados_obra)
+                            pdf_bytes = gerar_pdf_bytes(dados_obra, itens_da_obra(df_itens, dados_obra.get("ID")))
                             file_name = f"Orcamento_{dados_obra['ID']}_{cli_sel.replace(' ', '_')}.pdf"
                             st.download_button(
                                 label="⬇️ Baixar PDF Pronto",
@@ -762,5 +1342,7 @@ elif menu == "Gestão de Obras":
                             df_obras = excluir_obra(df_obras, id_del)
                             df_obras = limpar_obras(df_obras)
                             save_data(df_clientes, df_obras)
+                            df_itens = limpar_itens(df_itens, df_obras)
+                            save_itens(df_itens)
                             st.success("Obra removida.")
                             st.rerun()
@@ -0,0 +1,72 @@
+"""Benchmark do índice de clientes: python bench_indice_clientes.py [n_clientes]"""
+import random
+import statistics
+import sys
+import time
+
+from indice_clientes import IndiceClientes, ngramas_nome, normalizar_nome
+
+PRIMEIROS = ["Maria", "José", "Ana", "João", "Antônio", "Francisco", "Carlos", "Paulo", "Pedro", "Lucas",
+             "Luiz", "Marcos", "Luís", "Gabriel", "Rafael", "Francisca", "Daniel", "Marcelo", "Bruno", "Eduardo",
+             "Felipe", "Raimundo", "Rodrigo", "Antônia", "Adriana", "Juliana", "Márcia", "Fernanda", "Patrícia", "Aline",
+             "Sandra", "Camila", "Amanda", "Bruna", "Jéssica", "Letícia", "Júlia", "Luciana", "Vanessa", "Mariana",
+             "Gustavo", "Thiago", "Mateus", "Leonardo", "Sebastião", "Fábio", "Vitor", "Sérgio", "Cláudio", "Roberto"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+              "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+              "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas",
+              "Cardoso", "Ramos", "Gonçalves", "Santana", "Teixeira", "Araújo", "Moura", "Cavalcante", "Monteiro", "Batista",
+              "Coelho", "Campos", "Rezende", "Sousa", "Castro", "Pinto", "Farias", "Brito", "Miranda", "Sampaio"]
+PARTICULAS = ["", "", "da ", "de ", "dos "]
+
+def nome_aleatorio(rnd):
+    sobrenomes = rnd.sample(SOBRENOMES, rnd.choice([1, 2, 2, 3]))
+    return rnd.choice(PRIMEIROS) + " " + " ".join(rnd.choice(PARTICULAS) + s for s in sobrenomes)
+
+def perturbar(rnd, nome):
+    tipo = rnd.randrange(4)
+    if tipo == 0:  # erro de digitação
+        i = rnd.randrange(len(nome))
+        return nome[:i] + rnd.choice("abcdefghijklmnopqrstuvwxyz") + nome[i + 1:]
+    if tipo == 1:  # letra faltando
+        i = rnd.randrange(len(nome))
+        return nome[:i] + nome[i + 1:]
+    if tipo == 2:  # prefixo e caixa
+        return "Sr(a). " + nome.upper()
+    return "  " + nome.lower() + "  "
+
+def busca_exaustiva(indice, nome, limiar=0.75):
+    # Melhor similaridade possível comparando com todos os nomes do índice
+    chave = normalizar_nome(nome)
+    if chave in indice.por_chave: return 1.0
+    q = ngramas_nome(chave)
+    score = max(2 * len(q & g) / (len(q) + len(g)) for g in indice.grams.values())
+    return score if score >= limiar else 0.0
+
+def main(n_clientes=50000, n_buscas=2000, seed=42):
+    rnd = random.Random(seed)
+    nomes = [nome_aleatorio(rnd) for _ in range(n_clientes)]
+    # Nomes únicos o bastante para não serem todos homônimos
+    nomes = [f"{n} {rnd.choice(SOBRENOMES)}{rnd.randrange(100)}" if rnd.random() < 0.5 else n for n in nomes]
+
+    t = time.perf_counter()
+    indice = IndiceClientes(nomes)
+    t_build = time.perf_counter() - t
+
+    consultas = [perturbar(rnd, rnd.choice(nomes)) for _ in range(n_buscas)]
+    tempos, resultados = [], []
+    for c in consultas:
+        t = time.perf_counter()
+        resultados.append(indice.buscar(c))
+        tempos.append(time.perf_counter() - t)
+    tempos.sort()
+
+    amostra = list(range(0, n_buscas, 10))
+    iguais = sum(abs(resultados[i][1] - busca_exaustiva(indice, consultas[i])) < 1e-9 for i in amostra)
+
+    print(f"clientes: {n_clientes}  chaves: {len(indice)}  construção: {t_build:.2f} s")
+    print(f"busca  mediana: {statistics.median(tempos) * 1000:.3f} ms  "
+          f"p95: {tempos[int(len(tempos) * 0.95)] * 1000:.3f} ms  máx: {tempos[-1] * 1000:.3f} ms")
+    print(f"mesmo resultado da busca exaustiva: {iguais}/{len(amostra)}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,164 @@
+import math
+import re
+import unicodedata
+
+# =========================
+# ÍNDICE DE CLIENTES (BUSCA APROXIMADA)
+# =========================
+PREFIXOS_NOME = re.compile(r"^(?:sr\(a\)\.?|sr\.?|sra\.?|srta\.?|dr\.?|dra\.?|cliente:?)\s+", flags=re.IGNORECASE)
+PARTICULAS_NOME = {"da", "de", "do", "das", "dos", "e"}
+LIMITE_POSTING = 200    # listas de n-gramas maiores que isso não são varridas inteiras
+MAX_CANDIDATOS = 200    # no máximo isso de nomes é comparado por busca
+
+def normalizar_nome(nome) -> str:
+    # Sem acento, minúsculo, sem prefixo (Sr(a), Dr...), sem "da/de/dos" e com as palavras em ordem alfabética
+    s = str(nome or "").strip()
+    if s.lower() == "nan": return ""
+    while True:
+        novo = PREFIXOS_NOME.sub("", s)
+        if novo == s: break
+        s = novo
+    s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii").casefold()
+    s = re.sub(r"[^0-9a-z]+", " ", s)
+    return " ".join(sorted(t for t in s.split() if t not in PARTICULAS_NOME))
+
+def ngramas_nome(chave: str, n: int = 3) -> frozenset:
+    grams = set()
+    for token in chave.split():
+        t = f" {token} "
+        if len(t) <= n: grams.add(t)
+        else: grams.update(t[i:i + n] for i in range(len(t) - n + 1))
+    return frozenset(grams)
+
+def delecoes_token(token: str) -> set:
+    # O próprio token e todas as variantes com uma letra a menos
+    return {token} | {token[:i] + token[i + 1:] for i in range(len(token))}
+
+class IndiceClientes:
+    """Índice de nomes normalizados + n-gramas para achar clientes parecidos."""
+
+    def __init__(self, nomes=()):
+        self.por_chave = {}   # chave normalizada -> {nome original: nº de cadastros}
+        self.grams = {}       # chave normalizada -> n-gramas
+        self.postings = {}    # n-grama -> set de chaves
+        self.tokens = {}      # palavra -> set de chaves
+        self.vizinhos = {}    # palavra com até uma letra a menos -> set de palavras
+        for nome in nomes:
+            self.adicionar(nome)
+
+    def __len__(self):
+        return len(self.por_chave)
+
+    def adicionar(self, nome):
+        nome = str(nome or "").strip()
+        chave = normalizar_nome(nome)
+        if not chave: return
+        nomes = self.por_chave.get(chave)
+        if nomes is not None:
+            nomes[nome] = nomes.get(nome, 0) + 1
+            return
+        self.por_chave[chave] = {nome: 1}
+        g = ngramas_nome(chave)
+        self.grams[chave] = g
+        for gram in g:
+            self.postings.setdefault(gram, set()).add(chave)
+        for token in set(chave.split()):
+            if token not in self.tokens:
+                self.tokens[token] = set()
+                for d in delecoes_token(token):
+                    self.vizinhos.setdefault(d, set()).add(token)
+            self.tokens[token].add(chave)
+
+    def remover(self, nome, todos=False):
+        # Remove pelo nome exato; `todos` tira todos os cadastros com esse nome
+        nome = str(nome or "").strip()
+        chave = normalizar_nome(nome)
+        nomes = self.por_chave.get(chave)
+        if not nomes or nome not in nomes: return
+        if todos or nomes[nome] <= 1: del nomes[nome]
+        else: nomes[nome] -= 1
+        if nomes: return
+        del self.por_chave[chave]
+        for gram in self.grams.pop(chave):
+            bucket = self.postings.get(gram)
+            if bucket is None: continue
+            bucket.discard(chave)
+            if not bucket: del self.postings[gram]
+        for token in set(chave.split()):
+            chaves = self.tokens[token]
+            chaves.discard(chave)
+            if chaves: continue
+            del self.tokens[token]
+            for d in delecoes_token(token):
+                bucket = self.vizinhos[d]
+                bucket.discard(token)
+                if not bucket: del self.vizinhos[d]
+
+    def renomear(self, nome_antigo, nome_novo):
+        self.remover(nome_antigo)
+        self.adicionar(nome_novo)
+
+    def _por_palavras(self, chave):
+        """Chaves que têm todas as palavras da busca (ou uma a uma letra de distância).
+
+        Palavras sem correspondente ou que zerariam o resultado são ignoradas, e a
+        interseção para assim que cabe em MAX_CANDIDATOS.
+        """
+        grupos = []
+        for token in chave.split():
+            if token in self.tokens:
+                grupos.append([self.tokens[token]])
+                continue
+            parecidas = set()
+            for d in delecoes_token(token):
+                parecidas |= self.vizinhos.get(d, set())
+            if parecidas: grupos.append([self.tokens[t] for t in parecidas])
+        grupos.sort(key=lambda g: sum(map(len, g)))
+
+        resultado = None
+        for grupo in grupos:
+            conjunto = grupo[0] if len(grupo) == 1 else set().union(*grupo)
+            novo = conjunto if resultado is None else resultado & conjunto
+            if novo: resultado = novo
+            if len(resultado or ()) <= MAX_CANDIDATOS: break
+        return resultado if resultado and len(resultado) <= MAX_CANDIDATOS else set()
+
+    def _nome(self, chave):
+        return next(iter(self.por_chave[chave]))
+
+    def existente(self, nome):
+        chave = normalizar_nome(nome)
+        return self._nome(chave) if chave in self.por_chave else None
+
+    def buscar(self, nome, limiar: float = 0.75):
+        """Retorna (nome_existente, similaridade) ou (None, 0.0)."""
+        chave = normalizar_nome(nome)
+        if not chave: return None, 0.0
+        if chave in self.por_chave: return self._nome(chave), 1.0
+
+        q = ngramas_nome(chave)
+        n = len(q)
+        # Dice >= limiar exige pelo menos `minimo` n-gramas em comum, então todo
+        # candidato aparece em algum dos (n - minimo + 1) n-gramas mais raros.
+        minimo = max(1, math.ceil(limiar * n / (2 - limiar) - 1e-9))
+        listas = sorted((self.postings.get(g, ()) for g in q), key=len)
+        prefixo = listas[:n - minimo + 1]
+
+        # Listas pequenas entram inteiras. Se alguma do prefixo for grande (primeiros
+        # nomes, sobrenomes comuns), os candidatos dela vêm do índice de palavras.
+        candidatos = set().union(*(p for p in prefixo if len(p) <= LIMITE_POSTING))
+        if any(len(p) > LIMITE_POSTING for p in prefixo):
+            candidatos |= self._por_palavras(chave)
+
+        # Filtro de tamanho: com Dice >= limiar o outro nome tem entre
+        # n*limiar/(2-limiar) e n*(2-limiar)/limiar n-gramas.
+        min_len, max_len = n * limiar / (2 - limiar), n * (2 - limiar) / limiar
+        melhor, melhor_score = None, 0.0
+        for c in candidatos:
+            g = self.grams[c]
+            if not (min_len <= len(g) <= max_len): continue
+            score = 2 * len(q & g) / (n + len(g))
+            if score > melhor_score:
+                melhor, melhor_score = c, score
+        if melhor is None or melhor_score < limiar: return None, 0.0
+        return self._nome(melhor), melhor_score